@@ -1,6 +1,6 @@
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
-import api, { APIError } from '../services/api'
+import api, { APIError, connectLivePrediction } from '../services/api'
 import { validateStudentForm } from '../utils/validation'
 import '../styles/pages.css'
 
@@ -47,6 +47,55 @@ export default function Predict() {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
   const [validationErrors, setValidationErrors] = useState({})
+  const [livePrediction, setLivePrediction] = useState(null)
+
+  // Live prediction channel; only changed fields are sent
+  const liveRef = useRef(null)
+  const lastSentRef = useRef({})
+  const formDataRef = useRef(formData)
+
+  const syncLive = () => {
+    if (!liveRef.current) return
+    const current = formDataRef.current
+    const delta = {}
+    for (const [name, value] of Object.entries(current)) {
+      if (lastSentRef.current[name] !== value) {
+        delta[name] = value
+      }
+    }
+    if (Object.keys(delta).length > 0) {
+      liveRef.current.update(delta)
+      lastSentRef.current = { ...current }
+    }
+  }
+
+  useEffect(() => {
+    liveRef.current = connectLivePrediction((message) => {
+      // Keep the last estimate on errors; a rejected update is followed by a rescore
+      if (message.type === 'prediction') {
+        setLivePrediction(message.prediction)
+      } else if (message.type === 'incomplete') {
+        setLivePrediction(null)
+      }
+    }, {
+      // A new connection has an empty server session, so send everything
+      onOpen: syncLive,
+      onClose: () => {
+        setLivePrediction(null)
+        lastSentRef.current = {}
+      },
+    })
+    return () => {
+      liveRef.current.close()
+      liveRef.current = null
+      lastSentRef.current = {}
+    }
+  }, [])
+
+  useEffect(() => {
+    formDataRef.current = formData
+    syncLive()
+  }, [formData])
 
   /**
    * Handle form input changes with real-time validation
@@ -403,6 +452,12 @@ export default function Predict() {
 
         {error && <div className="error-message">{error}</div>}
 
+        {livePrediction !== null && (
+          <div className="live-prediction">
+            Live estimate: <strong>{livePrediction.toFixed(2)}</strong> / 20
+          </div>
+        )}
+
         <div className="form-actions">
           <button type="submit" className="submit-button" disabled={loading}>
             <span className="button-text">{loading ? 'Predicting...' : 'Predict Grade'}</span>
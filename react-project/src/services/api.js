@@ -92,7 +92,97 @@ export const api = {
       body: JSON.stringify({ students }),
     });
   },
+
+  /**
+   * Predict class-level grade statistics (aggregates only)
+   * @param {Array} students - Array of student features
+   * @param {Object} options - { passThreshold, groupBy } e.g. { groupBy: ['school'] }
+   */
+  async predictCohort(students, { passThreshold = 10, groupBy = null } = {}) {
+    return makeRequest('/predict-cohort', {
+      method: 'POST',
+      body: JSON.stringify({
+        students,
+        pass_threshold: passThreshold,
+        group_by: groupBy,
+      }),
+    });
+  },
+
+  /**
+   * Find the most similar historical students and their actual grades
+   * @param {Array} students - Array of student features
+   * @param {number} k - Similar students per input
+   */
+  async findSimilarStudents(students, k = 5) {
+    return makeRequest('/similar-students', {
+      method: 'POST',
+      body: JSON.stringify({ students, k }),
+    });
+  },
 };
 
+/**
+ * Open the live prediction WebSocket
+ * Sends only changed fields; the server scores the latest state and
+ * skips intermediate updates, so it is safe to call update() on every
+ * slider move. A dropped connection (server reload or restart) is
+ * reopened with exponential backoff; the new server session starts
+ * empty, so callers should resend the full state from onOpen.
+ * @param {Function} onMessage - Called with each server message
+ * @param {Object} [handlers]
+ * @param {Function} [handlers.onOpen] - Called each time the socket (re)connects
+ * @param {Function} [handlers.onClose] - Called when the connection drops
+ * @returns {{ update: Function, close: Function }}
+ */
+export function connectLivePrediction(onMessage, { onOpen, onClose } = {}) {
+  const url = `${API_BASE_URL.replace(/^http/, 'ws')}/ws/predict`;
+  let socket = null;
+  let pending = {};
+  let attempts = 0;
+  let retryTimer = null;
+  let closed = false;
+
+  const flush = () => {
+    if (socket && socket.readyState === WebSocket.OPEN && Object.keys(pending).length > 0) {
+      socket.send(JSON.stringify({ fields: pending }));
+      pending = {};
+    }
+  };
+
+  const connect = () => {
+    socket = new WebSocket(url);
+    socket.addEventListener('open', () => {
+      attempts = 0;
+      if (onOpen) onOpen();
+      flush();
+    });
+    socket.addEventListener('message', (event) => onMessage(JSON.parse(event.data)));
+    socket.addEventListener('close', () => {
+      if (closed) return;
+      // Deltas queued for the old session are meaningless to the next one
+      pending = {};
+      if (onClose) onClose();
+      const delay = Math.min(1000 * 2 ** attempts, 30000);
+      attempts += 1;
+      retryTimer = setTimeout(connect, delay);
+    });
+  };
+
+  connect();
+
+  return {
+    update(fields) {
+      pending = { ...pending, ...fields };
+      flush();
+    },
+    close() {
+      closed = true;
+      clearTimeout(retryTimer);
+      socket.close();
+    },
+  };
+}
+
 export { APIError };
 export default api;
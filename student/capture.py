@@ -0,0 +1,130 @@
+"""
+Sampled request capture for load testing
+Appends prediction requests to a JSONL file from a background thread
+"""
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCapture:
+    """
+    Buffered, sampled JSONL request log
+
+    Handlers only do a random draw and a non-blocking queue put; JSON
+    encoding and file I/O happen on a daemon writer thread. When the
+    queue is full the record is dropped rather than slowing the request.
+    Each flush is a single O_APPEND write, so several server workers can
+    share one capture file without interleaving lines.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        sample_rate: float = 1.0,
+        max_queue: int = 10000,
+        flush_interval: float = 1.0
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.sample_rate > 0
+
+    def record(self, endpoint: str, payload: Dict[str, Any]):
+        """
+        Queue a request for capture if it falls in the sample
+
+        Args:
+            endpoint: Name of the endpoint that served the request
+            payload: Request body as a plain dict
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+
+        # Writer threads don't survive fork, so start one per process
+        if self._pid != os.getpid():
+            self._start()
+
+        try:
+            self._queue.put_nowait((time.time(), endpoint, payload))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._thread = threading.Thread(target=self._run, name="request-capture", daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        fd = None
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            stopping = False
+            while not stopping:
+                lines = []
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    ts, endpoint, payload = item
+                    lines.append(json.dumps({'ts': ts, 'endpoint': endpoint, 'payload': payload}))
+
+                if lines:
+                    os.write(fd, ('\n'.join(lines) + '\n').encode())
+        except Exception as e:
+            # Stop sampling so handlers don't keep filling a dead queue
+            self.path = None
+            logger.error(f"Request capture disabled: {str(e)}")
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued records and stop the writer thread"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+        self._pid = None
+        if self.dropped:
+            logger.warning(f"Request capture dropped {self.dropped} records")
+
+
+# Singleton instance, disabled unless CAPTURE_PATH is set
+request_capture = RequestCapture(
+    path=os.getenv('CAPTURE_PATH'),
+    sample_rate=float(os.getenv('CAPTURE_SAMPLE_RATE', 1.0))
+)
@@ -0,0 +1,296 @@
+"""
+Data ingestion for the student performance datasets
+
+Python port of student-merge.R. Parses the semicolon-separated UCI files
+with explicit dtypes, joins the Math and Portuguese course records and
+caches the typed, encoded frames as memory-mapped column files keyed
+by the hash of the source CSVs, so repeated runs skip parsing.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+
+# Bump when parsing or cleaning changes so stale caches are ignored
+CACHE_VERSION = 3
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE_DIR = os.getenv('INGEST_CACHE_DIR') or os.path.join(DATA_DIR, '.cache')
+
+# Attribute domains from student.txt, sorted so category codes match
+# the LabelEncoder ordering used by train_model.py
+CATEGORIES: Dict[str, List[str]] = {
+    'school': ['GP', 'MS'],
+    'sex': ['F', 'M'],
+    'address': ['R', 'U'],
+    'famsize': ['GT3', 'LE3'],
+    'Pstatus': ['A', 'T'],
+    'Mjob': ['at_home', 'health', 'other', 'services', 'teacher'],
+    'Fjob': ['at_home', 'health', 'other', 'services', 'teacher'],
+    'reason': ['course', 'home', 'other', 'reputation'],
+    'guardian': ['father', 'mother', 'other'],
+    'schoolsup': ['no', 'yes'],
+    'famsup': ['no', 'yes'],
+    'paid': ['no', 'yes'],
+    'activities': ['no', 'yes'],
+    'nursery': ['no', 'yes'],
+    'higher': ['no', 'yes'],
+    'internet': ['no', 'yes'],
+    'romantic': ['no', 'yes'],
+}
+
+NUMERIC_DTYPES: Dict[str, str] = {
+    'age': 'int8',
+    'Medu': 'int8',
+    'Fedu': 'int8',
+    'traveltime': 'int8',
+    'studytime': 'int8',
+    'failures': 'int8',
+    'famrel': 'int8',
+    'freetime': 'int8',
+    'goout': 'int8',
+    'Dalc': 'int8',
+    'Walc': 'int8',
+    'health': 'int8',
+    'absences': 'int16',
+    'G1': 'int8',
+    'G2': 'int8',
+    'G3': 'int8',
+}
+
+# Valid ranges from student.txt, matching StudentInput; absences has no
+# documented upper bound there, so it is only capped by its dtype
+NUMERIC_RANGES: Dict[str, Tuple[int, int]] = {
+    'age': (15, 22),
+    'Medu': (0, 4),
+    'Fedu': (0, 4),
+    'traveltime': (1, 4),
+    'studytime': (1, 4),
+    'failures': (0, 4),
+    'famrel': (1, 5),
+    'freetime': (1, 5),
+    'goout': (1, 5),
+    'Dalc': (1, 5),
+    'Walc': (1, 5),
+    'health': (1, 5),
+    'absences': (0, int(np.iinfo(np.int16).max)),
+    'G1': (0, 20),
+    'G2': (0, 20),
+    'G3': (0, 20),
+}
+
+# Attributes identifying a student across both courses (see student-merge.R)
+MERGE_KEYS = [
+    'school', 'sex', 'age', 'address', 'famsize', 'Pstatus',
+    'Medu', 'Fedu', 'Mjob', 'Fjob', 'reason', 'nursery', 'internet'
+]
+
+MERGE_SUFFIXES = ('_mat', '_por')
+
+
+def check_numeric(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """
+    Range-check wide integer columns and downcast them to NUMERIC_DTYPES
+
+    Casting straight to int8/int16 wraps out-of-range values around
+    (G1=200 becomes -56), so values are checked before narrowing.
+
+    Args:
+        df: Frame whose numeric columns were parsed as int64
+        source: File name used in error messages
+
+    Returns:
+        The same frame with numeric columns narrowed in place
+
+    Raises:
+        ValueError: If a numeric column holds a value outside its range
+    """
+    for col, (low, high) in NUMERIC_RANGES.items():
+        if col not in df.columns:
+            continue
+        invalid = (df[col] < low) | (df[col] > high)
+        if invalid.any():
+            bad = sorted(set(df.loc[invalid, col].tolist()))
+            raise ValueError(f'Invalid value for {col} in {source}: {bad} (expected {low}-{high})')
+        df[col] = df[col].astype(NUMERIC_DTYPES[col])
+    return df
+
+
+def read_student_csv(path: str) -> pd.DataFrame:
+    """
+    Parse a student CSV with explicit dtypes
+
+    Args:
+        path: Semicolon-separated file in the student-mat.csv layout
+
+    Returns:
+        DataFrame with categorical and small-integer columns. Duplicate
+        rows are kept, as in R's read.table; deduplicate in the caller
+        if needed (train_model.py does)
+
+    Raises:
+        ValueError: If a column holds an unknown or out-of-range value
+    """
+    # Parse numbers wide and narrow them only after the range check
+    dtypes = {col: 'string' for col in CATEGORIES}
+    dtypes.update({col: 'int64' for col in NUMERIC_DTYPES})
+    df = pd.read_csv(path, sep=';', dtype=dtypes, engine='c')
+
+    for col, categories in CATEGORIES.items():
+        values = pd.Categorical(df[col], categories=categories)
+        unknown = df[col].notna() & (values.codes == -1)
+        if unknown.any():
+            bad = sorted(set(df.loc[unknown, col]))
+            raise ValueError(f'Invalid value for {col} in {path}: {bad}')
+        df[col] = values
+
+    return check_numeric(df, path)
+
+
+def _join_key(df: pd.DataFrame) -> np.ndarray:
+    """Pack the merge attributes into one int64 per row (mixed radix)"""
+    key = np.zeros(len(df), dtype=np.int64)
+    for col in MERGE_KEYS:
+        if col in CATEGORIES:
+            codes = df[col].cat.codes.to_numpy(dtype=np.int64)
+            radix = len(CATEGORIES[col])
+        else:
+            info = np.iinfo(NUMERIC_DTYPES[col])
+            codes = df[col].to_numpy(dtype=np.int64) - info.min
+            radix = int(info.max) - int(info.min) + 1
+        key = key * radix + codes
+    return key
+
+
+def merge_student_data(mat: pd.DataFrame, por: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join Math and Portuguese records of the same students
+
+    Equivalent to the inner merge in student-merge.R. The 13 identifying
+    attributes are packed into a single integer so the join hashes one
+    int64 column instead of comparing strings.
+
+    Args:
+        mat: Frame from student-mat.csv
+        por: Frame from student-por.csv
+
+    Returns:
+        One row per matched pair; non-key columns carry _mat/_por suffixes
+    """
+    left = mat.assign(_key=_join_key(mat))
+    right = por.drop(columns=MERGE_KEYS).assign(_key=_join_key(por))
+
+    merged = left.merge(right, on='_key', how='inner', suffixes=MERGE_SUFFIXES, sort=False)
+    return merged.drop(columns='_key')
+
+
+def source_hash(paths: List[str]) -> str:
+    """Hash the source file contents together with the cache version"""
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def _write_cache(df: pd.DataFrame, target: str):
+    """Store each column as a .npy file; categoricals as int8 codes"""
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+    schema = {'columns': list(df.columns), 'categories': {}}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            schema['categories'][col] = list(series.cat.categories)
+            data = series.cat.codes.to_numpy()
+        else:
+            data = series.to_numpy()
+        np.save(os.path.join(tmp, f'{i}.npy'), data, allow_pickle=False)
+
+    with open(os.path.join(tmp, 'schema.json'), 'w') as f:
+        json.dump(schema, f)
+
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        # Another process populated the same cache entry first
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _read_cache(target: str) -> pd.DataFrame:
+    """Rebuild a DataFrame from memory-mapped column files"""
+    with open(os.path.join(target, 'schema.json'), 'r') as f:
+        schema = json.load(f)
+
+    columns = {}
+    for i, col in enumerate(schema['columns']):
+        data = np.load(os.path.join(target, f'{i}.npy'), mmap_mode='r', allow_pickle=False)
+        if col in schema['categories']:
+            columns[col] = pd.Categorical.from_codes(data, categories=schema['categories'][col])
+        else:
+            columns[col] = data
+    return pd.DataFrame(columns, copy=False)
+
+
+def _cached(name: str, paths: List[str], build, cache_dir: Optional[str]) -> pd.DataFrame:
+    """Return the cache entry for the given sources, building it on a miss"""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    target = os.path.join(cache_dir, f'{name}-{source_hash(paths)}')
+
+    if os.path.isfile(os.path.join(target, 'schema.json')):
+        return _read_cache(target)
+
+    df = build()
+    _write_cache(df, target)
+    return df
+
+
+def load_student_data(path: str, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load one course dataset, parsing only when the file changed
+
+    Args:
+        path: Path to student-mat.csv or student-por.csv
+        cache_dir: Cache location (defaults to INGEST_CACHE_DIR or .cache)
+
+    Returns:
+        DataFrame with explicit dtypes. On a cache hit the numeric
+        columns are read-only memory maps; copy before mutating in place.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return _cached(name, [path], lambda: read_student_csv(path), cache_dir)
+
+
+def load_merged_data(
+    mat_path: str = os.path.join(DATA_DIR, 'student-mat.csv'),
+    por_path: str = os.path.join(DATA_DIR, 'student-por.csv'),
+    cache_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Load the Math/Portuguese join, reusing the cache when sources are unchanged
+
+    Args:
+        mat_path: Path to student-mat.csv
+        por_path: Path to student-por.csv
+        cache_dir: Cache location (defaults to INGEST_CACHE_DIR or .cache)
+
+    Returns:
+        Merged DataFrame (see merge_student_data)
+    """
+    def build():
+        return merge_student_data(read_student_csv(mat_path), read_student_csv(por_path))
+
+    return _cached('student-merge', [mat_path, por_path], build, cache_dir)
+
+
+if __name__ == "__main__":
+    merged = load_merged_data()
+    print(len(merged))  # 382 students
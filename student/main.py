@@ -11,11 +11,13 @@ from dotenv import load_dotenv
 import os
 import logging
 
-from routers import router
-
-# Load environment variables
+# Load environment variables (before importing modules that read them)
 load_dotenv()
 
+from routers import router
+from capture import request_capture
+from similarity import similar_students
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,10 +36,19 @@ async def lifespan(app: FastAPI):
     logger.info(f"Allowed Origins: {os.getenv('ALLOWED_ORIGINS', 'localhost')}")
     logger.info("=" * 60)
     
+    # Load (or build) the similar-students index before serving, so the
+    # first request doesn't block the event loop; a no-op when the prefork
+    # server already warmed it in the parent
+    try:
+        similar_students.load()
+    except Exception as e:
+        logger.warning(f"Similar-students index unavailable: {str(e)}")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Student Grade Prediction API")
+    request_capture.close()
 
 
 # Initialize FastAPI app with lifespan
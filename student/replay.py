@@ -0,0 +1,250 @@
+"""
+Offline replay benchmark
+Feeds a request capture back through PredictionService or the ASGI app
+and reports throughput, latency and prediction drift between models
+"""
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from services import PredictionService
+
+
+ENDPOINTS = ('predict', 'predict-batch')
+
+
+def load_capture(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Read captured requests from a JSONL file
+
+    Args:
+        path: Capture written by RequestCapture
+        limit: Maximum number of records to read
+
+    Returns:
+        Records with 'endpoint' and 'payload' keys
+    """
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get('endpoint') not in ENDPOINTS:
+                continue
+            records.append(record)
+            if limit and len(records) >= limit:
+                break
+    return records
+
+
+def _students(record: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if record['endpoint'] == 'predict':
+        return [record['payload']]
+    return record['payload']['students']
+
+
+class ServiceTarget:
+    """Replays directly against a PredictionService"""
+
+    def __init__(self, service: PredictionService):
+        self.service = service
+
+    async def call(self, record: Dict[str, Any]) -> List[float]:
+        if record['endpoint'] == 'predict':
+            return [self.service.predict_single(record['payload'])['prediction']]
+        result = self.service.predict_batch(record['payload']['students'])
+        return [p['prediction'] for p in result['predictions']]
+
+
+class AsgiTarget:
+    """Replays through the full FastAPI stack without a network socket"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def call(self, record: Dict[str, Any]) -> List[float]:
+        body = json.dumps(record['payload']).encode()
+        path = f"/api/{record['endpoint']}"
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode())
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('127.0.0.1', 8000)
+        }
+        request_sent = False
+        response = {'status': None, 'body': b''}
+
+        async def receive():
+            nonlocal request_sent
+            if request_sent:
+                return {'type': 'http.disconnect'}
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['body'] += message.get('body', b'')
+
+        await self.app(scope, receive, send)
+
+        data = json.loads(response['body'])
+        if response['status'] != 200:
+            raise RuntimeError(f"{path} returned {response['status']}: {data.get('detail')}")
+        if record['endpoint'] == 'predict':
+            return [data['prediction']]
+        return [p['prediction'] for p in data['predictions']]
+
+
+async def replay(target, records: List[Dict[str, Any]], rate: float = 0) -> Dict[str, Any]:
+    """
+    Send records to a target sequentially
+
+    With a rate, requests follow a fixed schedule and latency is measured
+    from the scheduled send time, so falling behind shows up as latency
+    instead of silently lowering the offered load.
+
+    Args:
+        target: ServiceTarget or AsgiTarget
+        records: Captured requests
+        rate: Requests per second (0 = as fast as possible)
+
+    Returns:
+        Throughput, latency percentiles and per-row predictions
+    """
+    latencies = []
+    predictions = []
+    errors = 0
+    rows = 0
+
+    start = time.perf_counter()
+    for i, record in enumerate(records):
+        scheduled = start + i / rate if rate else time.perf_counter()
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        try:
+            result = await target.call(record)
+        except Exception:
+            errors += 1
+            result = [None] * len(_students(record))
+        latencies.append(time.perf_counter() - scheduled)
+        predictions.extend(result)
+        rows += len(result)
+    elapsed = time.perf_counter() - start
+
+    latency_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'requests': len(records),
+        'rows': rows,
+        'errors': errors,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(len(records) / elapsed, 1) if elapsed else 0.0,
+        'rows_per_s': round(rows / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(float(np.percentile(latency_ms, 50)), 3),
+            'p90': round(float(np.percentile(latency_ms, 90)), 3),
+            'p99': round(float(np.percentile(latency_ms, 99)), 3),
+            'max': round(float(latency_ms.max()), 3)
+        },
+        'predictions': predictions
+    }
+
+
+def compare_models(
+    records: List[Dict[str, Any]],
+    baseline: List[Optional[float]],
+    candidate: PredictionService,
+    tolerance: float = 0.5
+) -> Dict[str, Any]:
+    """
+    Score the same records with a second model and summarise the drift
+
+    Args:
+        records: Captured requests that produced the baseline
+        baseline: Per-row predictions from the replay run
+        candidate: Service loaded with the other model version
+        tolerance: Absolute grade difference counted as a disagreement
+
+    Returns:
+        Mean/max absolute difference and number of rows beyond tolerance
+    """
+    students = [s for record in records for s in _students(record)]
+    keep = [i for i, value in enumerate(baseline) if value is not None]
+    if not keep:
+        return {'rows': 0}
+
+    result = candidate.predict_batch([students[i] for i in keep])
+    other = np.array([p['prediction'] for p in result['predictions']])
+    diff = np.abs(np.array([baseline[i] for i in keep]) - other)
+
+    return {
+        'rows': len(keep),
+        'mean_abs_diff': round(float(diff.mean()), 4),
+        'max_abs_diff': round(float(diff.max()), 4),
+        'beyond_tolerance': int((diff > tolerance).sum()),
+        'tolerance': tolerance
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured prediction requests")
+    parser.add_argument('capture', help="JSONL capture file (see CAPTURE_PATH)")
+    parser.add_argument('--target', choices=['service', 'asgi'], default='service',
+                        help="Call PredictionService directly or go through the FastAPI app")
+    parser.add_argument('--rate', type=float, default=0,
+                        help="Requests per second (default: as fast as possible)")
+    parser.add_argument('--limit', type=int, default=None, help="Replay at most this many requests")
+    parser.add_argument('--model-dir', default=None, help="Artifacts for the service target")
+    parser.add_argument('--compare', default=None, metavar='MODEL_DIR',
+                        help="Second model version to compare predictions against")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Grade difference counted as a disagreement")
+    args = parser.parse_args()
+
+    if args.target == 'asgi' and args.model_dir:
+        parser.error("--model-dir only applies to --target service; the ASGI app serves its own model")
+
+    records = load_capture(args.capture, args.limit)
+    if not records:
+        parser.error(f"No replayable records in {args.capture}")
+
+    if args.target == 'asgi':
+        from main import app
+        from capture import request_capture
+        request_capture.path = None  # don't capture the replay itself
+        target = AsgiTarget(app)
+    else:
+        target = ServiceTarget(PredictionService(args.model_dir))
+
+    report = asyncio.run(replay(target, records, args.rate))
+    predictions = report.pop('predictions')
+
+    if args.compare:
+        report['comparison'] = compare_models(
+            records, predictions, PredictionService(args.compare), args.tolerance
+        )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,24 @@
 """
 API routes for prediction endpoints
 """
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
 from schemas import (
     StudentInput,
     PredictionResponse,
     BatchPredictionRequest,
     BatchPredictionResponse,
+    CohortRequest,
+    CohortResponse,
+    SimilarStudentsRequest,
+    SimilarStudentsResponse,
     HealthResponse,
     MetadataResponse
 )
-from services import prediction_service
+from services import prediction_service, LiveSession
+from capture import request_capture
+from similarity import similar_students
 
 
 router = APIRouter()
@@ -27,6 +35,9 @@ async def root():
         'endpoints': {
             'predict': '/api/predict (POST)',
             'batch_predict': '/api/predict-batch (POST)',
+            'cohort_predict': '/api/predict-cohort (POST)',
+            'similar_students': '/api/similar-students (POST)',
+            'live_predict': '/api/ws/predict (WebSocket)',
             'metadata': '/api/metadata (GET)',
             'health': '/api/health (GET)'
         }
@@ -91,6 +102,7 @@ async def predict_grade(student: StudentInput):
     try:
         # Convert Pydantic model to dict
         student_data = student.dict()
+        request_capture.record('predict', student_data)
         
         # Make prediction
         result = prediction_service.predict_single(student_data)
@@ -126,6 +138,7 @@ async def predict_batch(request: BatchPredictionRequest):
     try:
         # Convert Pydantic models to dicts
         students_data = [student.dict() for student in request.students]
+        request_capture.record('predict-batch', {'students': students_data})
         
         # Make batch prediction
         result = prediction_service.predict_batch(students_data)
@@ -142,3 +155,151 @@ async def predict_batch(request: BatchPredictionRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Batch prediction failed: {str(e)}"
         )
+
+
+@router.post("/predict-cohort", response_model=CohortResponse, tags=["Predictions"])
+async def predict_cohort(request: CohortRequest):
+    """
+    Predict grade statistics for a class or cohort
+    
+    Scores every student in one pass but returns only aggregates
+    (mean, percentiles, 0-20 histogram, count below the pass threshold),
+    optionally broken down by categorical fields such as school or sex.
+    
+    Args:
+        request: Students, pass threshold and optional group_by fields
+    
+    Returns:
+        Fixed-size cohort summary with per-group summaries
+    """
+    try:
+        students_data = [student.dict() for student in request.students]
+        
+        return prediction_service.predict_cohort(
+            students_data,
+            pass_threshold=request.pass_threshold,
+            group_by=request.group_by
+        )
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Cohort prediction failed: {str(e)}"
+        )
+
+
+@router.post("/similar-students", response_model=SimilarStudentsResponse, tags=["Predictions"])
+async def find_similar_students(request: SimilarStudentsRequest):
+    """
+    Find the most similar historical students
+    
+    Looks up the nearest students from the Math and Portuguese datasets
+    in the model's scaled feature space and returns their actual final
+    grades alongside their recorded features.
+    
+    Args:
+        request: Students to match and number of neighbors (k)
+    
+    Returns:
+        Nearest historical students for each input, closest first
+    """
+    try:
+        students_data = [student.dict() for student in request.students]
+        
+        return {'results': similar_students.query(students_data, k=request.k)}
+    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Similar students lookup failed: {str(e)}"
+        )
+
+
+@router.websocket("/ws/predict")
+async def live_predict(websocket: WebSocket):
+    """
+    Live prediction channel for interactive forms
+    
+    Clients send field deltas as ``{"fields": {"G2": 12}}``; the first
+    message normally carries the full form. The server keeps the student
+    state per connection and scores only the latest state: updates that
+    arrive while a prediction is running are merged and the intermediate
+    states are skipped.
+    
+    Server messages:
+        {"type": "prediction", "prediction": 11.4, "seq": 3}
+        {"type": "incomplete", "missing": [...], "seq": 1}
+        {"type": "error", "errors": [...], "seq": 2}
+    
+    ``seq`` is the number of client messages reflected in the reply,
+    rejected ones included. A rejected message is reported as an error
+    and the current state is scored again, so the estimate stays valid.
+    """
+    await websocket.accept()
+    session = LiveSession(prediction_service)
+    updated = asyncio.Event()
+    rejected = []
+    
+    async def receive_updates():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except (ValueError, KeyError):
+                # Malformed JSON or a binary frame; reject it, keep the socket
+                message = None
+            fields = message.get('fields') if isinstance(message, dict) else None
+            try:
+                session.update(fields)
+            except ValueError as e:
+                rejected.append(str(e))
+            updated.set()
+    
+    reader = asyncio.create_task(receive_updates())
+    try:
+        while True:
+            waiter = asyncio.create_task(updated.wait())
+            await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if reader.done():
+                waiter.cancel()
+                reader.result()
+                return
+            updated.clear()
+            
+            if rejected:
+                await websocket.send_json({'type': 'error', 'errors': list(rejected), 'seq': session.updates})
+                rejected.clear()
+                if not session.state:
+                    continue
+            
+            missing = session.missing()
+            if missing:
+                await websocket.send_json({'type': 'incomplete', 'missing': missing, 'seq': session.updates})
+                continue
+            
+            try:
+                StudentInput(**session.state)
+                prediction = session.predict()
+            except ValidationError as e:
+                errors = [f"{' -> '.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+                await websocket.send_json({'type': 'error', 'errors': errors, 'seq': session.updates})
+                continue
+            except ValueError as e:
+                await websocket.send_json({'type': 'error', 'errors': [str(e)], 'seq': session.updates})
+                continue
+            
+            await websocket.send_json({'type': 'prediction', 'prediction': prediction, 'seq': session.updates})
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation
 """
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class StudentInput(BaseModel):
@@ -122,6 +122,66 @@ class BatchPredictionResponse(BaseModel):
     confidence: dict
 
 
+class CohortRequest(BaseModel):
+    """Cohort (class-level) prediction request"""
+    students: List[StudentInput] = Field(..., min_length=1)
+    pass_threshold: float = Field(10.0, ge=0, le=20, description="Grade below which a student is counted as failing")
+    group_by: Optional[List[str]] = Field(None, description="Categorical fields to break the summary down by (e.g. school, sex)")
+
+
+class CohortSummary(BaseModel):
+    """Aggregate statistics for a set of predicted grades"""
+    count: int
+    mean: float
+    std: float
+    min: float
+    max: float
+    percentiles: Dict[str, float]
+    histogram: List[int] = Field(..., description="Students per grade point, bins [0,1) ... [19,20]")
+    below_threshold: int
+    pass_rate: float
+
+
+class CohortGroup(BaseModel):
+    """Summary for one group_by combination"""
+    group: Dict[str, str]
+    summary: CohortSummary
+
+
+class CohortResponse(BaseModel):
+    """Cohort prediction response"""
+    count: int
+    pass_threshold: float
+    summary: CohortSummary
+    groups: List[CohortGroup]
+    confidence: dict
+
+
+class SimilarStudentsRequest(BaseModel):
+    """Similar historical students request"""
+    students: List[StudentInput] = Field(..., min_length=1)
+    k: int = Field(5, ge=1, le=50, description="Number of similar students per input")
+
+
+class SimilarStudent(BaseModel):
+    """Historical student close to the query in feature space"""
+    distance: float
+    course: str = Field(..., description="Source dataset (student-mat or student-por)")
+    G3: int = Field(..., description="Actual final grade (0-20)")
+    features: dict
+
+
+class SimilarStudentsResult(BaseModel):
+    """Neighbors for one input student"""
+    student: int
+    neighbors: List[SimilarStudent]
+
+
+class SimilarStudentsResponse(BaseModel):
+    """Similar historical students response"""
+    results: List[SimilarStudentsResult]
+
+
 class HealthResponse(BaseModel):
     """Health check response"""
     status: str
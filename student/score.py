@@ -0,0 +1,201 @@
+"""
+Bulk scoring CLI
+Scores large student CSV exports out of core with a process pool
+
+Usage:
+    python score.py export.csv predictions.csv --workers 8 --resume
+"""
+import argparse
+import io
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+
+from ingest import CATEGORIES, NUMERIC_DTYPES, check_numeric
+from services import available_cpus, prediction_service
+
+
+# Parse categorical fields as plain strings; the label encoders map them.
+# Numbers are parsed wide so out-of-range values fail the range check
+# instead of wrapping around in int8/int16.
+INPUT_DTYPES = {col: str for col in CATEGORIES}
+INPUT_DTYPES.update({col: 'int64' for col in NUMERIC_DTYPES})
+
+
+def _score_chunk(data: bytes, source: str) -> np.ndarray:
+    """Parse, validate and score one chunk inside a worker process"""
+    df = check_numeric(pd.read_csv(io.BytesIO(data), sep=';', dtype=INPUT_DTYPES), source)
+    return prediction_service.predict_scaled(prediction_service.preprocess_batch(df))
+
+
+class BulkScorer:
+    """
+    Chunked, ordered, resumable scorer over a semicolon-separated CSV
+
+    The parent reads raw line chunks and hands them to a process pool
+    forked after the model is loaded, so workers share it copy-on-write
+    and parse in parallel. At most ``2 * workers`` chunks are in flight,
+    which bounds memory regardless of file size. Results are written in
+    input order, and a sidecar ``.progress`` file records the input and
+    output offsets after each chunk so an interrupted run can resume.
+    """
+
+    def __init__(self, input_path: str, output_path: str, chunksize: int = 50000, workers: int = 1):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.progress_path = f'{output_path}.progress'
+        self.chunksize = chunksize
+        self.workers = max(1, workers)
+
+    def _load_progress(self) -> dict:
+        if not os.path.isfile(self.progress_path):
+            return {}
+        with open(self.progress_path, 'r') as f:
+            progress = json.load(f)
+        stat = os.stat(self.input_path)
+        if progress.get('input_size') != stat.st_size or progress.get('input_mtime') != stat.st_mtime:
+            raise ValueError(f'{self.input_path} changed since the interrupted run; rerun without --resume')
+        return progress
+
+    def _save_progress(self, progress: dict):
+        tmp = f'{self.progress_path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp, self.progress_path)
+
+    def _read_chunks(self, src, header: bytes):
+        """Yield (header + lines, row count, end offset) for each chunk"""
+        while True:
+            lines = []
+            for line in src:
+                if line.strip():
+                    lines.append(line)
+                if len(lines) >= self.chunksize:
+                    break
+            if not lines:
+                return
+            yield header + b''.join(lines), len(lines), src.tell()
+
+    def run(self, resume: bool = False) -> dict:
+        """
+        Score the whole input, writing ``row;prediction`` lines
+
+        Args:
+            resume: Continue from the last completed chunk of a previous run
+
+        Returns:
+            Rows scored, elapsed seconds and rows per second for this run
+        """
+        if resume:
+            progress = self._load_progress()
+        else:
+            # A fresh run must not leave a stale sidecar for a later --resume
+            progress = {}
+            if os.path.exists(self.progress_path):
+                os.remove(self.progress_path)
+        if progress and not os.path.isfile(self.output_path):
+            raise ValueError(f'{self.output_path} is missing; rerun without --resume')
+        stat = os.stat(self.input_path)
+        rows_done = progress.get('rows', 0)
+        rows_at_start = rows_done
+        rows_queued = rows_done
+
+        # Pool processes share the CPUs like server workers do
+        prediction_service.thread_budget.set_workers(self.workers)
+        methods = mp.get_all_start_methods()
+        context = mp.get_context('fork' if 'fork' in methods else 'spawn')
+
+        start = time.perf_counter()
+        with open(self.input_path, 'rb') as src, open(self.output_path, 'ab' if progress else 'wb') as out:
+            header = src.readline()
+            if progress:
+                src.seek(progress['input_offset'])
+                out.truncate(progress['output_offset'])
+                out.seek(progress['output_offset'])
+            else:
+                out.write(b'row;prediction\n')
+
+            with context.Pool(self.workers) as pool:
+                pending = deque()
+                chunks = self._read_chunks(src, header)
+                exhausted = False
+
+                while not exhausted or pending:
+                    # Keep the pool busy without reading ahead unboundedly
+                    while not exhausted and len(pending) < 2 * self.workers:
+                        try:
+                            data, n_rows, offset = next(chunks)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        source = f'{self.input_path} (rows {rows_queued}-{rows_queued + n_rows - 1})'
+                        rows_queued += n_rows
+                        pending.append((pool.apply_async(_score_chunk, (data, source)), n_rows, offset))
+
+                    if not pending:
+                        break
+                    result, n_rows, offset = pending.popleft()
+                    predictions = result.get()
+
+                    rows = np.arange(rows_done, rows_done + n_rows)
+                    out.write(''.join(f'{r};{p:.2f}\n' for r, p in zip(rows, predictions)).encode())
+                    out.flush()
+                    os.fsync(out.fileno())
+                    rows_done += n_rows
+
+                    self._save_progress({
+                        'input_size': stat.st_size,
+                        'input_mtime': stat.st_mtime,
+                        'input_offset': offset,
+                        'output_offset': out.tell(),
+                        'rows': rows_done
+                    })
+                    self._report(rows_done - rows_at_start, offset / max(stat.st_size, 1), start)
+
+        elapsed = time.perf_counter() - start
+        # No chunk was scored (empty or header-only export), so no sidecar
+        if os.path.exists(self.progress_path):
+            os.remove(self.progress_path)
+        sys.stderr.write('\n')
+
+        scored = rows_done - rows_at_start
+        return {
+            'rows': scored,
+            'total_rows': rows_done,
+            'elapsed_s': round(elapsed, 3),
+            'rows_per_s': round(scored / elapsed, 1) if elapsed else 0.0
+        }
+
+    @staticmethod
+    def _report(rows: int, fraction: float, start: float):
+        elapsed = time.perf_counter() - start
+        rate = rows / elapsed if elapsed else 0.0
+        sys.stderr.write(f'\r{fraction:6.1%}  {rows} rows  {rate:,.0f} rows/s')
+        sys.stderr.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a student CSV export without going through HTTP")
+    parser.add_argument('input', help="Semicolon-separated file in the student-mat.csv layout")
+    parser.add_argument('output', help="Where to write row;prediction lines")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk")
+    parser.add_argument('--workers', type=int, default=available_cpus(), help="Scoring processes")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted run")
+    args = parser.parse_args()
+
+    scorer = BulkScorer(args.input, args.output, args.chunksize, args.workers)
+    try:
+        report = scorer.run(resume=args.resume)
+    except ValueError as e:
+        parser.exit(1, f"error: {str(e)}\n")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
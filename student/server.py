@@ -0,0 +1,281 @@
+"""
+Preforking production server
+Loads the prediction model once and forks uvicorn workers that share it
+"""
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import time
+
+import uvicorn
+
+# Importing the app loads PredictionService in this (parent) process, so
+# every forked worker inherits the same model pages copy-on-write.
+from main import app
+from services import available_cpus, prediction_service
+from similarity import similar_students
+
+
+logger = logging.getLogger(__name__)
+
+HANDLED_SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD)
+
+# A worker exiting sooner than this after boot counts as a failed start
+MIN_WORKER_LIFETIME = 5.0
+# Consecutive failed starts of one slot before the server gives up
+MAX_BOOT_FAILURES = 5
+MAX_RESTART_DELAY = 30.0
+
+
+class PreforkServer:
+    """
+    Parent process that owns the listening socket and the loaded model
+
+    Signals:
+        SIGTERM / SIGINT: graceful shutdown of all workers
+        SIGHUP: reload model artifacts, start fresh workers, retire old ones
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        workers: int,
+        pin_cpus: bool = False,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: int = 30
+    ):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.pin_cpus = pin_cpus
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+
+        self.sock = None
+        self.children = {}   # pid -> worker slot
+        self.started = {}    # pid -> boot time
+        self.retiring = set()
+        self.failures = {}   # slot -> consecutive failed starts
+        self.restarts = {}   # slot -> time a delayed restart is due
+
+    def bind(self):
+        """Create the shared listening socket before any fork"""
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+
+    def spawn_worker(self, slot: int):
+        """Fork a single worker bound to the given slot"""
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            self.started[pid] = time.monotonic()
+            logger.info(f"Booted worker {slot} (pid {pid})")
+            return
+
+        exit_code = 0
+        try:
+            self._run_worker(slot)
+        except BaseException:
+            logger.exception(f"Worker {slot} crashed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self, slot: int):
+        """Worker body: restore signal state, optionally pin, serve requests"""
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, HANDLED_SIGNALS)
+        for sig in HANDLED_SIGNALS:
+            signal.signal(sig, signal.SIG_DFL)
+
+        if self.pin_cpus and hasattr(os, 'sched_setaffinity'):
+            cpus = sorted(os.sched_getaffinity(0))
+            cpu = cpus[slot % len(cpus)]
+            os.sched_setaffinity(0, {cpu})
+            logger.info(f"Worker {slot} pinned to CPU {cpu}")
+            # The parent's budget split all CPUs; this worker now owns one
+            prediction_service.thread_budget.set_workers(1)
+
+        # Jitter spreads recycling so workers don't all restart at once
+        limit = None
+        if self.max_requests > 0:
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+
+        config = uvicorn.Config(
+            app,
+            log_level="info",
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=self.graceful_timeout
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def reap_workers(self):
+        """Collect exited workers and replace those that were not retired"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            slot = self.children.pop(pid, None)
+            started = self.started.pop(pid, None)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if slot is None:
+                continue
+
+            # Back off exponentially when a worker keeps dying right after boot;
+            # clean exits (MAX_REQUESTS recycling) never count as failures
+            quick = started is not None and time.monotonic() - started < MIN_WORKER_LIFETIME
+            if status != 0 and quick:
+                self.failures[slot] = self.failures.get(slot, 0) + 1
+            else:
+                self.failures[slot] = 0
+
+            failures = self.failures[slot]
+            if failures >= MAX_BOOT_FAILURES:
+                raise RuntimeError(f"Worker {slot} failed to boot {failures} times in a row")
+            delay = min(2 ** failures - 1, MAX_RESTART_DELAY)
+            # Negative codes are the terminating signal number
+            code = os.waitstatus_to_exitcode(status)
+            logger.info(f"Worker {slot} (pid {pid}) exited with code {code}, restarting in {delay:.0f}s")
+            self.restarts[slot] = time.monotonic() + delay
+
+    def restart_workers(self):
+        """Spawn replacements whose restart delay has elapsed"""
+        now = time.monotonic()
+        for slot, due in list(self.restarts.items()):
+            if due <= now:
+                del self.restarts[slot]
+                self.spawn_worker(slot)
+
+    def reload(self):
+        """Reload the model in the parent and roll over to new workers"""
+        logger.info("Reloading model artifacts")
+        try:
+            prediction_service.load()
+        except Exception as e:
+            logger.error(f"Reload failed, keeping current model: {str(e)}")
+            return
+        similar_students.reset()
+        self._warm_up()
+        gc.freeze()
+
+        old_pids = list(self.children)
+        self.retiring.update(old_pids)
+        self.restarts.clear()
+        self.failures.clear()
+        for slot in range(self.workers):
+            self.spawn_worker(slot)
+        for pid in old_pids:
+            self.children.pop(pid, None)
+            self._signal(pid, signal.SIGTERM)
+
+    def stop(self):
+        """Gracefully stop every worker, killing stragglers after the timeout"""
+        pids = set(self.children) | self.retiring
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while pids and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                pids.discard(pid)
+            else:
+                time.sleep(0.1)
+
+        for pid in pids:
+            self._signal(pid, signal.SIGKILL)
+        self.children.clear()
+        self.started.clear()
+        self.retiring.clear()
+        self.restarts.clear()
+
+    @staticmethod
+    def _warm_up():
+        """Load lazily-built indexes in the parent so workers share them"""
+        try:
+            similar_students.load()
+        except Exception as e:
+            logger.warning(f"Similar-students index unavailable: {str(e)}")
+
+    @staticmethod
+    def _signal(pid: int, sig: int):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def run(self):
+        """Bind, fork the initial workers and supervise them until stopped"""
+        self.bind()
+        logger.info(f"Listening on {self.host}:{self.port} with {self.workers} workers")
+
+        self._warm_up()
+
+        # Keep the loaded model out of the cyclic GC so collections in
+        # workers don't touch (and copy) the shared pages.
+        gc.collect()
+        gc.freeze()
+
+        # Split the CPUs between workers unless a budget was configured
+        prediction_service.thread_budget.set_workers(self.workers)
+
+        signal.pthread_sigmask(signal.SIG_BLOCK, HANDLED_SIGNALS)
+        for slot in range(self.workers):
+            self.spawn_worker(slot)
+
+        try:
+            while True:
+                info = signal.sigtimedwait(HANDLED_SIGNALS, 1.0)
+                sig = info.si_signo if info else None
+
+                if sig in (signal.SIGTERM, signal.SIGINT):
+                    logger.info("Shutting down workers")
+                    break
+                if sig == signal.SIGHUP:
+                    self.reload()
+                self.reap_workers()
+                self.restart_workers()
+        except RuntimeError as e:
+            logger.error(f"{str(e)}, shutting down")
+            raise SystemExit(1)
+        finally:
+            self.stop()
+            self.sock.close()
+
+
+def main():
+    """Start the prefork server using environment configuration"""
+    server = PreforkServer(
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 8000)),
+        # Containers often report the host's cores, so stay conservative
+        # unless WEB_CONCURRENCY is set explicitly
+        workers=int(os.getenv("WEB_CONCURRENCY") or min(2, available_cpus())),
+        pin_cpus=os.getenv("WORKER_CPU_AFFINITY", "false").lower() == "true",
+        max_requests=int(os.getenv("MAX_REQUESTS", 0)),
+        max_requests_jitter=int(os.getenv("MAX_REQUESTS_JITTER", 0)),
+        graceful_timeout=int(os.getenv("GRACEFUL_TIMEOUT", 30))
+    )
+    server.run()
+
+
+if __name__ == "__main__":
+    main()
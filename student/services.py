@@ -6,33 +6,135 @@ import json
 import numpy as np
 import pandas as pd
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from joblib import parallel_config
+from threadpoolctl import threadpool_limits
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects affinity/cpuset limits)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ThreadBudget:
+    """
+    Per-worker thread budget for model inference
+    
+    The pickled forest carries ``n_jobs=-1`` from training, which would
+    start a thread pool across every core on each predict call and
+    compete with the other server workers. The budget pins BLAS/OpenMP
+    pools to one thread per worker and only lets the forest fan out
+    across trees for batches large enough to amortise the pool.
+    """
+    
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        parallel_batch_size: Optional[int] = None,
+        workers: int = 1
+    ):
+        if max_threads is None:
+            max_threads = int(os.getenv('PREDICT_MAX_THREADS') or 0)
+        if parallel_batch_size is None:
+            parallel_batch_size = int(os.getenv('PREDICT_PARALLEL_BATCH_SIZE', 1000))
+        
+        # 0 means "auto": share the available CPUs between server workers
+        self.configured_threads = max_threads
+        self.parallel_batch_size = parallel_batch_size
+        self.set_workers(workers)
+    
+    def set_workers(self, workers: int):
+        """Recompute the budget for the number of server processes sharing the CPUs"""
+        if self.configured_threads > 0:
+            self.max_threads = self.configured_threads
+        else:
+            self.max_threads = max(1, available_cpus() // max(1, workers))
+    
+    def apply(self, model):
+        """Cap native thread pools and defer forest parallelism to the budget"""
+        threadpool_limits(limits=1)
+        if hasattr(model, 'n_jobs'):
+            # None makes joblib fall back to the active parallel_config
+            model.n_jobs = None
+    
+    def threads_for(self, n_rows: int) -> int:
+        """Number of inference threads for a batch of n_rows"""
+        if n_rows < self.parallel_batch_size:
+            return 1
+        return self.max_threads
+    
+    def limit(self, n_rows: int):
+        """Context manager scoping forest parallelism for one predict call"""
+        return parallel_config(n_jobs=self.threads_for(n_rows))
 
 
 class PredictionService:
     """Service for handling prediction logic"""
     
-    def __init__(self):
-        """Load model and preprocessing objects"""
-        model_dir = os.path.dirname(os.path.abspath(__file__))
+    def __init__(self, model_dir: Optional[str] = None):
+        """
+        Load model and preprocessing objects
+        
+        Args:
+            model_dir: Directory holding the model artifacts
+                (defaults to this module's directory)
+        """
+        self.model_dir = model_dir or os.path.dirname(os.path.abspath(__file__))
+        self.thread_budget = ThreadBudget()
+        self.load()
+    
+    def load(self):
+        """
+        (Re)load model and preprocessing objects from disk
+        
+        Called once at construction and again by the prefork server
+        when it is asked to pick up new artifacts. Everything is read
+        before anything is swapped in, so a failed reload leaves the
+        current artifacts untouched.
+        """
+        model_dir = self.model_dir
         
         # Load model
         with open(os.path.join(model_dir, 'model.pkl'), 'rb') as f:
-            self.model = pickle.load(f)
+            model = pickle.load(f)
         
         # Load preprocessing objects
         with open(os.path.join(model_dir, 'scaler.pkl'), 'rb') as f:
-            self.scaler = pickle.load(f)
+            scaler = pickle.load(f)
         
         with open(os.path.join(model_dir, 'label_encoders.pkl'), 'rb') as f:
-            self.label_encoders = pickle.load(f)
+            label_encoders = pickle.load(f)
         
         with open(os.path.join(model_dir, 'feature_columns.pkl'), 'rb') as f:
-            self.feature_columns = pickle.load(f)
+            feature_columns = pickle.load(f)
         
         # Load metadata
         with open(os.path.join(model_dir, 'model_metadata.json'), 'r') as f:
-            self.metadata = json.load(f)
+            metadata = json.load(f)
+        
+        # Per-feature lookups for encoding single fields without pandas
+        feature_index = {col: i for i, col in enumerate(feature_columns)}
+        category_codes = {
+            col: {value: code for code, value in enumerate(encoder.classes_)}
+            for col, encoder in label_encoders.items()
+        }
+        n_features = len(feature_columns)
+        scale_mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale_std = scaler.scale_ if scaler.with_std else np.ones(n_features)
+        
+        self.thread_budget.apply(model)
+        
+        self.model = model
+        self.scaler = scaler
+        self.label_encoders = label_encoders
+        self.feature_columns = feature_columns
+        self.metadata = metadata
+        self.feature_index = feature_index
+        self.category_codes = category_codes
+        self.scale_mean = scale_mean
+        self.scale_std = scale_std
     
     def preprocess_input(self, data: Dict[str, Any]) -> np.ndarray:
         """
@@ -71,6 +173,79 @@ class PredictionService:
         
         return input_scaled
     
+    def preprocess_batch(self, input_df: pd.DataFrame) -> np.ndarray:
+        """
+        Preprocess a frame of students for prediction
+        
+        Args:
+            input_df: One row per student with raw feature values
+            
+        Returns:
+            Preprocessed numpy array
+            
+        Raises:
+            ValueError: If the frame is empty or preprocessing fails
+        """
+        if input_df.empty:
+            raise ValueError('Data list cannot be empty')
+        
+        # Ensure all required columns are present
+        missing_cols = set(self.feature_columns) - set(input_df.columns)
+        if missing_cols:
+            raise ValueError(f'Missing required features: {missing_cols}')
+        
+        # Reorder columns (copy, so callers keep the raw values)
+        input_df = input_df[self.feature_columns].copy()
+        
+        # Encode categorical variables
+        for col in self.metadata['categorical_features']:
+            if col in input_df.columns and col in self.label_encoders:
+                try:
+                    input_df[col] = self.label_encoders[col].transform(input_df[col])
+                except ValueError as e:
+                    raise ValueError(f'Invalid value for {col}: {str(e)}')
+        
+        # Scale features
+        return self.scaler.transform(input_df)
+    
+    def scale_fields(self, fields: Dict[str, Any], row: np.ndarray):
+        """
+        Encode and scale individual features into an existing row
+        
+        Equivalent to preprocess_input for the given slots only, so a
+        cached row can be updated when a few fields change.
+        
+        Args:
+            fields: Feature values to write
+            row: Scaled feature vector updated in place
+            
+        Raises:
+            ValueError: If a feature is unknown or a value is invalid
+        """
+        for col, value in fields.items():
+            if col not in self.feature_index:
+                raise ValueError(f'Unknown feature: {col}')
+            i = self.feature_index[col]
+            if col in self.category_codes:
+                if value not in self.category_codes[col]:
+                    raise ValueError(f'Invalid value for {col}: {value}')
+                value = self.category_codes[col][value]
+            row[i] = (float(value) - self.scale_mean[i]) / self.scale_std[i]
+    
+    def predict_scaled(self, input_scaled: np.ndarray) -> np.ndarray:
+        """
+        Run the model on preprocessed rows within the thread budget
+        
+        Args:
+            input_scaled: Scaled feature matrix
+            
+        Returns:
+            Predictions clipped to the 0-20 grade scale
+        """
+        with self.thread_budget.limit(len(input_scaled)):
+            predictions = self.model.predict(input_scaled)
+        return np.clip(predictions, 0, 20)
+    
     def predict_single(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make prediction for single student
@@ -84,11 +259,8 @@ class PredictionService:
         # Preprocess input
         input_scaled = self.preprocess_input(data)
         
-        # Make prediction
-        prediction = self.model.predict(input_scaled)[0]
-        
-        # Ensure prediction is within valid range (0-20)
-        prediction = max(0, min(20, prediction))
+        # Make prediction (clipped to the valid 0-20 range)
+        prediction = self.predict_scaled(input_scaled)[0]
         
         return {
             'prediction': round(float(prediction), 2),
@@ -109,34 +281,10 @@ class PredictionService:
         Returns:
             Batch prediction results
         """
-        if not data_list:
-            raise ValueError('Data list cannot be empty')
-        
-        # Create DataFrame
-        input_df = pd.DataFrame(data_list)
-        
-        # Ensure all required columns are present
-        missing_cols = set(self.feature_columns) - set(input_df.columns)
-        if missing_cols:
-            raise ValueError(f'Missing required features: {missing_cols}')
-        
-        # Reorder columns
-        input_df = input_df[self.feature_columns]
-        
-        # Encode categorical variables
-        for col in self.metadata['categorical_features']:
-            if col in input_df.columns and col in self.label_encoders:
-                try:
-                    input_df[col] = self.label_encoders[col].transform(input_df[col])
-                except ValueError as e:
-                    raise ValueError(f'Invalid value for {col}: {str(e)}')
-        
-        # Scale features
-        input_scaled = self.scaler.transform(input_df)
+        input_scaled = self.preprocess_batch(pd.DataFrame(data_list))
         
         # Make predictions
-        predictions = self.model.predict(input_scaled)
-        predictions = np.clip(predictions, 0, 20)
+        predictions = self.predict_scaled(input_scaled)
         
         # Format results
         results = []
@@ -156,6 +304,82 @@ class PredictionService:
             }
         }
     
+    def predict_cohort(
+        self,
+        data_list: List[Dict[str, Any]],
+        pass_threshold: float = 10.0,
+        group_by: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Score a group of students and return only aggregate statistics
+        
+        Args:
+            data_list: List of student features
+            pass_threshold: Grade below which a student counts as failing
+            group_by: Optional categorical fields to break the summary down by
+            
+        Returns:
+            Cohort summary plus one summary per group; the size depends
+            only on the number of groups, not on the number of students
+            
+        Raises:
+            ValueError: If input is invalid or a group_by field is not categorical
+        """
+        group_by = group_by or []
+        invalid = [col for col in group_by if col not in self.metadata['categorical_features']]
+        if invalid:
+            raise ValueError(f'Cannot group by {invalid}; choose from categorical features')
+        
+        input_df = pd.DataFrame(data_list)
+        predictions = self.predict_scaled(self.preprocess_batch(input_df))
+        
+        groups = []
+        if group_by:
+            grouped = pd.Series(predictions).groupby([input_df[col] for col in group_by], sort=True)
+            for key, indices in grouped.indices.items():
+                key = key if isinstance(key, tuple) else (key,)
+                groups.append({
+                    'group': dict(zip(group_by, key)),
+                    'summary': self._cohort_summary(predictions[indices], pass_threshold)
+                })
+        
+        return {
+            'count': len(predictions),
+            'pass_threshold': pass_threshold,
+            'summary': self._cohort_summary(predictions, pass_threshold),
+            'groups': groups,
+            'confidence': {
+                'r2_score': self.metadata['r2_score'],
+                'mae': self.metadata['mae']
+            }
+        }
+    
+    @staticmethod
+    def _cohort_summary(predictions: np.ndarray, pass_threshold: float) -> Dict[str, Any]:
+        """Aggregate statistics for one set of predicted grades"""
+        # One bin per grade point over the 0-20 scale (last bin includes 20)
+        histogram, _ = np.histogram(predictions, bins=20, range=(0, 20))
+        p10, p25, p50, p75, p90 = np.percentile(predictions, [10, 25, 50, 75, 90])
+        below = int((predictions < pass_threshold).sum())
+        
+        return {
+            'count': len(predictions),
+            'mean': round(float(predictions.mean()), 2),
+            'std': round(float(predictions.std()), 2),
+            'min': round(float(predictions.min()), 2),
+            'max': round(float(predictions.max()), 2),
+            'percentiles': {
+                'p10': round(float(p10), 2),
+                'p25': round(float(p25), 2),
+                'p50': round(float(p50), 2),
+                'p75': round(float(p75), 2),
+                'p90': round(float(p90), 2)
+            },
+            'histogram': histogram.tolist(),
+            'below_threshold': below,
+            'pass_rate': round(1 - below / len(predictions), 4)
+        }
+    
     def get_metadata(self) -> Dict[str, Any]:
         """Get model metadata"""
         return {
@@ -171,5 +395,71 @@ class PredictionService:
         return self.model is not None
 
 
-# Singleton instance
-prediction_service = PredictionService()
+class LiveSession:
+    """
+    Per-connection student state for live (incremental) predictions
+    
+    Keeps the scaled feature vector between updates and re-encodes only
+    the fields that changed since the last prediction.
+    """
+    
+    def __init__(self, service: PredictionService):
+        self.service = service
+        self.state: Dict[str, Any] = {}
+        self.dirty = set()
+        self.row = np.zeros((1, len(service.feature_columns)))
+        self.updates = 0
+    
+    def update(self, fields: Dict[str, Any]):
+        """
+        Merge a field delta into the session state
+        
+        Every call counts towards ``updates``, including rejected ones,
+        so replies can be matched to the client messages they reflect.
+        
+        Raises:
+            ValueError: If the delta is not a dict or contains unknown features
+        """
+        self.updates += 1
+        if not isinstance(fields, dict):
+            raise ValueError('Expected a message of the form {"fields": {...}}')
+        unknown = set(fields) - set(self.service.feature_index)
+        if unknown:
+            raise ValueError(f'Unknown features: {sorted(unknown)}')
+        self.state.update(fields)
+        self.dirty.update(fields)
+    
+    def missing(self) -> List[str]:
+        """Features not yet provided by the client"""
+        return [col for col in self.service.feature_columns if col not in self.state]
+    
+    def predict(self) -> float:
+        """
+        Predict from the current state, re-encoding only changed fields
+        
+        Raises:
+            ValueError: If features are missing or a value is invalid
+        """
+        missing = self.missing()
+        if missing:
+            raise ValueError(f'Missing required features: {missing}')
+        
+        # Dirty fields stay pending if encoding fails, so they are retried
+        self.service.scale_fields({col: self.state[col] for col in self.dirty}, self.row[0])
+        self.dirty.clear()
+        
+        return round(float(self.service.predict_scaled(self.row)[0]), 2)
+
+
+def __getattr__(name: str):
+    """
+    Create the shared PredictionService on first access
+    
+    Keeps ``import services`` cheap for tools that only need the class
+    (replay.py loads its own model directories).
+    """
+    if name == 'prediction_service':
+        service = PredictionService()
+        globals()['prediction_service'] = service
+        return service
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,133 @@
+"""
+Nearest-neighbor lookup of similar historical students
+"""
+import logging
+import os
+import threading
+import joblib
+import pandas as pd
+from sklearn.neighbors import BallTree
+from typing import Any, Dict, List, Optional
+
+from ingest import CATEGORIES, DATA_DIR, DEFAULT_CACHE_DIR, load_student_data, source_hash
+from services import PredictionService, prediction_service
+
+
+logger = logging.getLogger(__name__)
+
+# Historical datasets to index; override with a comma-separated list
+DEFAULT_DATA_FILES = [
+    os.path.join(DATA_DIR, 'student-mat.csv'),
+    os.path.join(DATA_DIR, 'student-por.csv'),
+]
+
+# Artifacts that define the feature space the index is built in
+PREPROCESSING_ARTIFACTS = ['scaler.pkl', 'label_encoders.pkl', 'feature_columns.pkl']
+
+
+class SimilarStudentIndex:
+    """
+    Ball tree over historical students in the model's scaled feature space
+
+    The tree is built once per model version (preprocessing artifacts plus
+    source data) and persisted next to the ingest cache, so later startups
+    only unpickle it. A ball tree is used rather than a KD-tree because
+    the 32-dimensional feature space defeats axis-aligned splits.
+    """
+
+    def __init__(
+        self,
+        service: PredictionService,
+        data_files: Optional[List[str]] = None,
+        cache_dir: Optional[str] = None
+    ):
+        if data_files is None:
+            env_files = os.getenv('SIMILAR_DATA_FILES')
+            data_files = env_files.split(',') if env_files else DEFAULT_DATA_FILES
+
+        self.service = service
+        self.data_files = data_files
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+
+        self.tree = None
+        self.records = None
+        self._lock = threading.Lock()
+
+    def _version(self) -> str:
+        artifacts = [os.path.join(self.service.model_dir, name) for name in PREPROCESSING_ARTIFACTS]
+        return source_hash(artifacts + self.data_files)
+
+    def _load_history(self) -> pd.DataFrame:
+        frames = []
+        for path in self.data_files:
+            df = load_student_data(path, self.cache_dir)
+            frames.append(df.assign(course=os.path.splitext(os.path.basename(path))[0]))
+        return pd.concat(frames, ignore_index=True)
+
+    def load(self):
+        """Load the persisted index for the current version, building it on a miss"""
+        with self._lock:
+            if self.tree is not None:
+                return
+
+            path = os.path.join(self.cache_dir, f'similar-{self._version()}.joblib')
+            if os.path.isfile(path):
+                self.tree, self.records = joblib.load(path)
+                return
+
+            logger.info("Building similar-students index")
+            history = self._load_history()
+            features = self.service.preprocess_batch(history)
+            tree = BallTree(features)
+            records = history.astype({col: str for col in CATEGORIES}).to_dict('records')
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            joblib.dump((tree, records), tmp)
+            os.replace(tmp, path)
+
+            self.tree, self.records = tree, records
+
+    def reset(self):
+        """Drop the in-memory index so the next query picks up a new model"""
+        with self._lock:
+            self.tree = None
+            self.records = None
+
+    def query(self, data_list: List[Dict[str, Any]], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the k most similar historical students for each input
+
+        Args:
+            data_list: List of student features
+            k: Neighbors per student
+
+        Returns:
+            Per input student, neighbors ordered by distance with their
+            recorded features and actual final grade (G3)
+
+        Raises:
+            ValueError: If preprocessing fails
+        """
+        self.load()
+        features = self.service.preprocess_batch(pd.DataFrame(data_list))
+        k = min(k, len(self.records))
+        distances, indices = self.tree.query(features, k=k)
+
+        results = []
+        for i, (row_distances, row_indices) in enumerate(zip(distances, indices)):
+            neighbors = []
+            for distance, index in zip(row_distances, row_indices):
+                record = dict(self.records[index])
+                neighbors.append({
+                    'distance': round(float(distance), 4),
+                    'course': record.pop('course'),
+                    'G3': record.pop('G3'),
+                    'features': record
+                })
+            results.append({'student': i + 1, 'neighbors': neighbors})
+        return results
+
+
+# Singleton instance; the index itself is loaded on first use
+similar_students = SimilarStudentIndex(prediction_service)
@@ -7,11 +7,13 @@ from sklearn.metrics import mean_absolute_error, r2_score
 import pickle
 import warnings
 
+from ingest import load_student_data
+
 warnings.filterwarnings('ignore')
 
-# Load data
+# Load data (parsed once, then served from the ingest cache)
 print("Loading data...")
-df = pd.read_csv('student-mat.csv', sep=';')
+df = load_student_data('student-mat.csv')
 
 print(f"Dataset shape: {df.shape}")
 print(f"\nColumns: {list(df.columns)}")
@@ -40,8 +42,8 @@ X = df.drop('G3', axis=1)
 y = df['G3']
 
 # Identify categorical and numerical columns
-categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-numerical_cols = X.select_dtypes(include=['int64', 'float64']).columns.tolist()
+categorical_cols = X.select_dtypes(include=['category']).columns.tolist()
+numerical_cols = X.select_dtypes(include=['number']).columns.tolist()
 
 print(f"Categorical features: {categorical_cols}")
 print(f"Numerical features: {numerical_cols}")